@@ -9,6 +9,7 @@ sys.path.append(current_dir)
 
 try:
     from src.core.load_manager import LoadSheddingManager
+    from src.core.checkpointer import Checkpointer
     from src.models.models import TimeSlot, ReportType
     print("✓ تم تحميل المكتبات بنجاح")
 except ImportError as e:
@@ -20,6 +21,7 @@ except ImportError as e:
         'src/__init__.py',
         'src/core/__init__.py', 
         'src/core/load_manager.py',
+        'src/core/checkpointer.py',
         'src/models/__init__.py',
         'src/models/models.py'
     ]
@@ -32,9 +34,30 @@ except ImportError as e:
     
     sys.exit(1)
 
+DATA_FILE = 'data/load_data.json'
+
+def load_manager(data_file):
+    """تحميل بيانات الخطوط، مع إنشاء ملف أولي إذا لم يكن موجوداً"""
+    if not os.path.exists(data_file):
+        print("⚠️ لم يتم العثور على ملف البيانات، جاري الإنشاء التلقائي...")
+        LoadSheddingManager(data_file=data_file, auto_load=False).initialize_load_data(data_file)
+    manager = LoadSheddingManager.from_data_file(data_file, verbose=True)
+    print("✓ تم تحميل بيانات الخطوط بنجاح")
+    return manager
+
 def main():
     print("🚀 بدء تشغيل نظام إدارة الأحمال...")
-    manager = LoadSheddingManager()
+    checkpointer = None
+    try:
+        manager = load_manager(DATA_FILE)
+    except Exception as e:
+        # لا يُشغّل الحفظ التلقائي حتى لا تُكتب البيانات الافتراضية فوق الملف
+        print(f"❌ {e}")
+        print(f"⚠️ سيتم العمل بالبيانات الافتراضية دون حفظ، ولن يتم تعديل {DATA_FILE}")
+        manager = LoadSheddingManager(data_file=DATA_FILE, verbose=False)
+    else:
+        checkpointer = Checkpointer(manager, DATA_FILE, interval_seconds=30, change_threshold=20)
+        checkpointer.start()
     
     while True:
         print("\n" + "="*50)
@@ -62,15 +85,28 @@ def main():
             elif choice == '5':
                 toggle_line_status(manager)
             elif choice == '6':
-                manager.save_data('data/load_data.json')
-                print("✓ تم حفظ البيانات")
+                if checkpointer is None:
+                    print("❌ الحفظ معطل لأن ملف البيانات لم يُحمّل بنجاح")
+                else:
+                    if checkpointer.consecutive_failures:
+                        print(f"⚠️ فشلت آخر {checkpointer.consecutive_failures} محاولة حفظ: {checkpointer.last_error}")
+                    checkpointer.request_checkpoint()
+                    print("✓ جاري حفظ البيانات في الخلفية")
             elif choice == '7':
-                manager.save_data('data/load_data.json')
-                print("✓ تم حفظ البيانات والخروج")
+                if checkpointer is None:
+                    print("⚠️ تم الخروج دون حفظ البيانات")
+                    break
+                checkpointer.stop(flush=False)
+                if checkpointer.checkpoint():
+                    print("✓ تم حفظ البيانات والخروج")
+                else:
+                    print(f"❌ فشل حفظ البيانات: {checkpointer.last_error}")
                 break
             else:
                 print("❌ خيار غير صحيح")
         except KeyboardInterrupt:
+            if checkpointer is not None:
+                checkpointer.stop()
             print("\n\n⚠️ تم إيقاف البرنامج بواسطة المستخدم")
             break
         except Exception as e:
@@ -0,0 +1,188 @@
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Optional, Set
+
+class Checkpointer:
+    """
+    حفظ دوري للبيانات في خيط خلفي
+
+    يُحفظ الملف عند مرور interval_seconds على أقدم تغيير غير محفوظ، أو عند
+    بلوغ عدد التغييرات change_threshold، أو عند الطلب. يُؤخذ في خيط الحفظ
+    نسخة سريعة من الخطوط والسجل، ثم تُحوّل إلى JSON وتُكتب خارج القفل.
+    بعد فشل الحفظ ينتظر الخيط مدة تتضاعف مع كل فشل متتالٍ (من retry_seconds
+    حتى max_retry_seconds) قبل المحاولة مجدداً، إلا عند طلب الحفظ صراحة.
+    """
+    def __init__(self, manager, filename: str = None,
+                 interval_seconds: Optional[float] = 60.0,
+                 change_threshold: Optional[int] = 100,
+                 retry_seconds: float = 1.0,
+                 max_retry_seconds: float = 300.0):
+        self.manager = manager
+        self.filename = filename or manager.data_file
+        self.interval_seconds = interval_seconds
+        self.change_threshold = change_threshold
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+
+        self._pending_changes = 0
+        self._first_pending_at: Optional[float] = None
+        self._requested = False
+        self._pending_lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._retry_at: Optional[float] = None
+
+        self.checkpoint_count = 0
+        self.failure_count = 0
+        self.consecutive_failures = 0
+        self.last_duration_seconds = 0.0
+        self.max_duration_seconds = 0.0
+        self.last_lag_seconds = 0.0
+        self.last_checkpoint_time: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+        manager.add_change_listener(self._on_change)
+
+    def start(self):
+        """تشغيل خيط الحفظ"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='checkpointer', daemon=True)
+        self._thread.start()
+
+    def stop(self, flush: bool = True, timeout: float = None):
+        """إيقاف خيط الحفظ، مع حفظ أخير للتغييرات المعلقة"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if flush and self.pending_changes:
+            self.checkpoint()
+
+    def close(self, flush: bool = True):
+        """إيقاف الخيط وإلغاء متابعة تغييرات المدير"""
+        self.stop(flush)
+        self.manager.remove_change_listener(self._on_change)
+
+    def request_checkpoint(self):
+        """طلب حفظ فوري دون انتظار"""
+        with self._pending_lock:
+            self._requested = True
+        self._wake.set()
+
+    @property
+    def pending_changes(self) -> int:
+        return self._pending_changes
+
+    @property
+    def lag_seconds(self) -> float:
+        """عمر أقدم تغيير لم يُحفظ بعد"""
+        first_pending_at = self._first_pending_at
+        return time.monotonic() - first_pending_at if first_pending_at is not None else 0.0
+
+    def get_metrics(self) -> Dict:
+        """مقاييس الحفظ"""
+        return {
+            'checkpoint_count': self.checkpoint_count,
+            'failure_count': self.failure_count,
+            'consecutive_failures': self.consecutive_failures,
+            'pending_changes': self.pending_changes,
+            'lag_seconds': round(self.lag_seconds, 3),
+            'last_lag_seconds': round(self.last_lag_seconds, 3),
+            'last_duration_seconds': round(self.last_duration_seconds, 3),
+            'max_duration_seconds': round(self.max_duration_seconds, 3),
+            'last_checkpoint_time': self.last_checkpoint_time,
+            'last_error': self.last_error
+        }
+
+    def checkpoint(self) -> bool:
+        """حفظ نسخة من البيانات الآن"""
+        with self._checkpoint_lock:
+            started = time.monotonic()
+
+            # يُصفّر العداد قبل أخذ النسخة: أي تغيير أُبلغ عنه قبل التصفير
+            # حدث قبله فيدخل في النسخة، وما بعده يُحسب للحفظ التالي
+            with self._pending_lock:
+                pending_changes = self._pending_changes
+                first_pending_at = self._first_pending_at
+                self._pending_changes = 0
+                self._first_pending_at = None
+                self._requested = False
+            snapshot = self.manager.snapshot()
+
+            try:
+                self.manager.write_snapshot(snapshot, self.filename)
+            except Exception as e:
+                with self._pending_lock:
+                    self._pending_changes += pending_changes
+                    if first_pending_at is not None:
+                        self._first_pending_at = min(first_pending_at, self._first_pending_at or first_pending_at)
+                self.failure_count += 1
+                self.consecutive_failures += 1
+                self.last_error = str(e)
+                delay = min(self.max_retry_seconds,
+                            self.retry_seconds * 2 ** (self.consecutive_failures - 1))
+                self._retry_at = time.monotonic() + delay
+                return False
+
+            finished = time.monotonic()
+            self.checkpoint_count += 1
+            self.last_duration_seconds = finished - started
+            self.max_duration_seconds = max(self.max_duration_seconds, self.last_duration_seconds)
+            self.last_lag_seconds = finished - first_pending_at if first_pending_at is not None else 0.0
+            self.last_checkpoint_time = datetime.now()
+            self.last_error = None
+            self.consecutive_failures = 0
+            self._retry_at = None
+            return True
+
+    def _on_change(self, line_ids: List[int], groups: Set[int],
+                   month_keys: Optional[Set[str]] = None):
+        """تسجيل تغيير جديد (يُستدعى من خيط المستخدم، لذا يبقى سريعاً)"""
+        with self._pending_lock:
+            self._pending_changes += 1
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+            due = self.change_threshold is not None and self._pending_changes >= self.change_threshold
+        if due:
+            self._wake.set()
+
+    def _is_due(self) -> bool:
+        """هل حان وقت الحفظ (الطلب الصريح لا ينتظر انتهاء مهلة إعادة المحاولة)"""
+        with self._pending_lock:
+            if self._requested:
+                return True
+            if self._retry_at is not None and time.monotonic() < self._retry_at:
+                return False
+            if not self._pending_changes:
+                return False
+            if self.change_threshold is not None and self._pending_changes >= self.change_threshold:
+                return True
+            return (self.interval_seconds is not None
+                    and time.monotonic() - self._first_pending_at >= self.interval_seconds)
+
+    def _wait_timeout(self) -> Optional[float]:
+        """المدة حتى موعد الحفظ التالي حسب الفاصل الزمني أو مهلة إعادة المحاولة"""
+        retry_at = self._retry_at
+        if retry_at is not None and time.monotonic() < retry_at:
+            return retry_at - time.monotonic()
+        if self.interval_seconds is None:
+            return None
+        first_pending_at = self._first_pending_at
+        if first_pending_at is None:
+            return self.interval_seconds
+        return max(0.0, self.interval_seconds - (time.monotonic() - first_pending_at))
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self._wait_timeout())
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            if self._is_due():
+                self.checkpoint()
@@ -0,0 +1,99 @@
+from typing import List, Dict, Optional, Set, FrozenSet, Tuple, Iterable
+from collections import defaultdict
+from ..models.models import LoadLine
+
+class LineRegistry:
+    """
+    سجل الخطوط مع فهرس حسب المعرف وعضوية المجموعات
+
+    يدعم معرفات غير متتالية، وتعيد دوال التحديث الجماعي قائمة المعرفات
+    التي تغيرت فعلاً مع المجموعات المتأثرة.
+    """
+    def __init__(self, lines: Iterable[LoadLine] = ()):
+        self.lines: List[LoadLine] = []
+        self._by_id: Dict[int, LoadLine] = {}
+        self._groups: Dict[int, Set[int]] = defaultdict(set)
+        self.rebuild(lines)
+
+    def rebuild(self, lines: Iterable[LoadLine]):
+        """إعادة بناء الفهارس من قائمة خطوط (لا يتغير شيء إذا تكرر معرف)"""
+        new_lines = []
+        by_id = {}
+        groups = defaultdict(set)
+        for line in lines:
+            if line.id in by_id:
+                raise ValueError(f"الخط {line.id} موجود مسبقاً")
+            new_lines.append(line)
+            by_id[line.id] = line
+            groups[line.group].add(line.id)
+
+        self.lines = new_lines
+        self._by_id = by_id
+        self._groups = groups
+
+    def add(self, line: LoadLine):
+        """إضافة خط جديد"""
+        if line.id in self._by_id:
+            raise ValueError(f"الخط {line.id} موجود مسبقاً")
+        self.lines.append(line)
+        self._by_id[line.id] = line
+        self._groups[line.group].add(line.id)
+
+    def get(self, line_id: int) -> Optional[LoadLine]:
+        """الحصول على خط حسب المعرف"""
+        return self._by_id.get(line_id)
+
+    def __contains__(self, line_id: int) -> bool:
+        return line_id in self._by_id
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def group_ids(self, group: int) -> FrozenSet[int]:
+        """معرفات خطوط مجموعة معينة (نسخة للقراءة فقط)"""
+        return frozenset(self._groups.get(group, ()))
+
+    def group_lines(self, group: int) -> List[LoadLine]:
+        """خطوط مجموعة معينة"""
+        return [self._by_id[line_id] for line_id in self._groups.get(group, ())]
+
+    def set_capacity(self, updates: Dict[int, float]) -> Tuple[List[int], Set[int]]:
+        """تحديث سعة عدة خطوط"""
+        changed, groups = [], set()
+        for line_id, capacity_mw in updates.items():
+            line = self._by_id.get(line_id)
+            if line is None or line.capacity_mw == capacity_mw:
+                continue
+            line.capacity_mw = capacity_mw
+            changed.append(line_id)
+            groups.add(line.group)
+        return changed, groups
+
+    def set_status(self, updates: Dict[int, bool]) -> Tuple[List[int], Set[int]]:
+        """تفعيل/تعطيل عدة خطوط"""
+        changed, groups = [], set()
+        for line_id, is_active in updates.items():
+            line = self._by_id.get(line_id)
+            if line is None or line.is_active == is_active:
+                continue
+            line.is_active = is_active
+            changed.append(line_id)
+            groups.add(line.group)
+        return changed, groups
+
+    def set_group(self, updates: Dict[int, int]) -> Tuple[List[int], Set[int]]:
+        """نقل عدة خطوط بين المجموعات"""
+        changed, groups = [], set()
+        for line_id, group in updates.items():
+            line = self._by_id.get(line_id)
+            if line is None or line.group == group:
+                continue
+            self._groups[line.group].discard(line_id)
+            self._groups[group].add(line_id)
+            groups.update((line.group, group))
+            line.group = group
+            changed.append(line_id)
+        return changed, groups
@@ -1,39 +1,114 @@
+import csv
 import json
 import heapq
+import math
 import os
+import sys
+import stat
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import List, Dict, Optional, Tuple, Set, Callable
 from collections import defaultdict
 from ..models.models import *
+from .line_registry import LineRegistry
+from ..utils.calendar_cache import rotation_group, month_key
 
 class LoadSheddingManager:
-    def __init__(self, total_lines=20, lines_per_group=10):
+    def __init__(self, total_lines=20, lines_per_group=10,
+                 data_file: str = 'data/load_data.json', verbose: bool = True,
+                 auto_load: bool = True):
         self.total_lines = total_lines
         self.lines_per_group = lines_per_group
-        self.lines: List[LoadLine] = []
+        self.data_file = data_file
+        self.verbose = verbose
+        self.registry = LineRegistry()
+        self._change_listeners: List[Callable[[List[int], Set[int], Optional[Set[str]]], None]] = []
+        # يحمي تعديل الخطوط والسجل عند أخذ نسخة للحفظ
+        self._state_lock = threading.RLock()
         self.shedding_history: List[SheddingRecord] = []
         self.stats: Dict[int, LoadSheddingStats] = {}
         self.current_day_group = 0
+        self.detached_reason: Optional[str] = None
         
-        self._initialize_with_data()
+        if auto_load:
+            self._initialize_with_data()
+    
+    @classmethod
+    def from_data_file(cls, data_file: str, verbose: bool = False) -> 'LoadSheddingManager':
+        """
+        تحميل مدير من ملف بيانات موجود
+
+        بخلاف المُنشئ لا يُنشئ ملفاً جديداً ولا يعود للبيانات الافتراضية:
+        أي ملف مفقود أو تالف يرفع استثناء.
+        """
+        manager = cls(data_file=data_file, verbose=verbose, auto_load=False)
+        manager.load_data(data_file)
+        return manager
+    
+    def detach(self, reason: str):
+        """منع أي تعديل لاحق على هذا المدير (مثلاً بعد إخراجه من الذاكرة)"""
+        self.detached_reason = reason
+    
+    def _check_writable(self):
+        if self.detached_reason is not None:
+            raise RuntimeError(f"لا يمكن تعديل بيانات مدير منفصل: {self.detached_reason}")
+    
+    @property
+    def lines(self) -> List[LoadLine]:
+        return self.registry.lines
+    
+    @lines.setter
+    def lines(self, lines: List[LoadLine]):
+        with self._state_lock:
+            self.registry.rebuild(lines)
+    
+    def add_change_listener(self, callback: Callable[[List[int], Set[int], Optional[Set[str]]], None]):
+        """
+        تسجيل دالة تُستدعى مرة واحدة بعد كل دفعة تغييرات على الخطوط
+
+        تستقبل الدالة معرفات الخطوط والمجموعات المتأثرة، ومفاتيح الأشهر التي
+        تغيرت إحصائياتها (None عند تغير خصائص الخطوط نفسها).
+        """
+        self._change_listeners.append(callback)
+    
+    def remove_change_listener(self, callback: Callable[[List[int], Set[int], Optional[Set[str]]], None]):
+        """إلغاء تسجيل دالة سبق تسجيلها"""
+        if callback in self._change_listeners:
+            self._change_listeners.remove(callback)
+    
+    def has_change_listeners(self) -> bool:
+        """هل توجد دوال مسجلة لمتابعة التغييرات"""
+        return bool(self._change_listeners)
+    
+    def _notify_lines_changed(self, line_ids: List[int], groups: Set[int],
+                              month_keys: Optional[Set[str]] = None):
+        """إبلاغ المستمعين بتغير خطوط ضمن مجموعات معينة"""
+        if not line_ids:
+            return
+        for callback in list(self._change_listeners):
+            callback(line_ids, groups, month_keys)
     
     def _initialize_with_data(self):
         """التهيئة مع تحميل البيانات أو إنشائها تلقائياً"""
         try:
-            self.load_data('data/load_data.json')
-            print("✓ تم تحميل بيانات الخطوط بنجاح")
+            self.load_data(self.data_file)
+            self._log("✓ تم تحميل بيانات الخطوط بنجاح")
         except FileNotFoundError:
-            print("⚠️ لم يتم العثور على ملف البيانات، جاري الإنشاء التلقائي...")
-            self.initialize_load_data()
-            self.load_data('data/load_data.json')
+            self._log("⚠️ لم يتم العثور على ملف البيانات، جاري الإنشاء التلقائي...")
+            self.initialize_load_data(self.data_file)
+            self.load_data(self.data_file)
         except Exception as e:
-            print(f"❌ خطأ في تحميل البيانات: {e}")
+            self._log(f"❌ خطأ في تحميل البيانات: {e}")
             self._initialize_lines()
             self._initialize_stats()
     
     def initialize_load_data(self, filename: str = 'data/load_data.json'):
         """إنشاء ملف بيانات أولي للخطوط العشرين"""
-        os.makedirs('data', exist_ok=True)
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
         
         initial_data = {
             'lines': [
@@ -52,10 +127,16 @@ class LoadSheddingManager:
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(initial_data, f, indent=2, ensure_ascii=False)
         
-        print(f"✓ تم إنشاء ملف البيانات الأولي بـ {len(initial_data['lines'])} خط")
+        self._log(f"✓ تم إنشاء ملف البيانات الأولي بـ {len(initial_data['lines'])} خط")
+    
+    def _log(self, message: str):
+        """طباعة رسالة عند تفعيل الوضع التفصيلي"""
+        if self.verbose:
+            print(message)
     
     def _initialize_lines(self):
         """تهيئة الخطوط الكهربائية (بدون ملف)"""
+        lines = []
         for i in range(self.total_lines):
             group = 0 if i < self.lines_per_group else 1
             line = LoadLine(
@@ -64,90 +145,110 @@ class LoadSheddingManager:
                 group=group,
                 capacity_mw=10.0
             )
-            self.lines.append(line)
+            lines.append(line)
+        self.lines = lines
     
     def _initialize_stats(self):
         """تهيئة الإحصائيات"""
-        for line in self.lines:
-            self.stats[line.id] = LoadSheddingStats(
+        self.stats = self._build_stats(self.lines)
+    
+    @staticmethod
+    def _build_stats(lines: List[LoadLine],
+                     records: List[SheddingRecord] = ()) -> Dict[int, LoadSheddingStats]:
+        """بناء إحصائيات جديدة للخطوط من سجل فصل (يرفع ValueError لسجل خط غير معروف)"""
+        stats = {
+            line.id: LoadSheddingStats(
                 line_id=line.id,
                 total_hours=0.0,
                 monthly_hours={},
                 last_shedding_time=None
             )
+            for line in lines
+        }
+        
+        now = datetime.now()
+        for record in records:
+            line_stats = stats.get(record.line_id)
+            if line_stats is None:
+                raise ValueError(f"سجل فصل للخط {record.line_id} غير الموجود")
+            monthly_key = month_key(record.date.month, record.date.year)
+            line_stats.total_hours += record.duration_hours
+            line_stats.monthly_hours[monthly_key] = line_stats.monthly_hours.get(monthly_key, 0) + record.duration_hours
+            line_stats.last_shedding_time = now
+        return stats
 
     # ========== دوال التقارير الجديدة ==========
 
     def generate_period_report(self, start_date: date, end_date: date, report_type: ReportType = ReportType.CUSTOM) -> PeriodReport:
         """إنشاء تقرير لفترة محددة"""
+        return self.generate_batch_reports([(start_date, end_date, report_type)])[0]
+
+    def generate_batch_reports(self, periods: List[Tuple[date, date, ReportType]],
+                               workers: int = None) -> List[PeriodReport]:
+        """
+        إنشاء تقارير لعدة فترات بمسح واحد لسجل الفصل
+
+        تُجمّع السجلات حسب اليوم مرة واحدة، ثم يُبنى كل تقرير من الأيام الواقعة
+        ضمن فترته. عند تحديد workers > 1 تُبنى التقارير على عدة عمليات؛ المسح
+        نفسه يبقى في العملية الحالية، لذا يفيد ذلك عند كثرة الفترات أو الخطوط فقط.
+        """
+        if not periods:
+            return []
         
-        # تصفية السجلات ضمن الفترة المطلوبة
-        period_records = [
-            record for record in self.shedding_history
-            if start_date <= record.date <= end_date
-        ]
-        
-        # إحصائيات الخطوط
-        line_stats = {}
-        total_hours = 0
-        total_reduction = 0
-        
-        for line in self.lines:
-            line_records = [r for r in period_records if r.line_id == line.id]
-            line_hours = sum(r.duration_hours for r in line_records)
-            line_reduction = sum(r.load_reduced_mw for r in line_records)
+        span_start = min(period[0] for period in periods)
+        span_end = max(period[1] for period in periods)
+        
+        # تجميع السجلات حسب اليوم ثم حسب الخط
+        day_buckets = {}
+        for record in self.shedding_history:
+            if not span_start <= record.date <= span_end:
+                continue
+            bucket = day_buckets.get(record.date)
+            if bucket is None:
+                bucket = day_buckets[record.date] = {'hours': 0.0, 'reduction': 0.0, 'count': 0, 'lines': {}}
+            bucket['hours'] += record.duration_hours
+            bucket['reduction'] += record.load_reduced_mw
+            bucket['count'] += 1
             
-            line_stats[line.id] = {
-                'line_name': line.name,
-                'group': line.group,
-                'total_hours': round(line_hours, 2),
-                'total_reduction': round(line_reduction, 2),
-                'shedding_count': len(line_records),
-                'average_duration': round(line_hours / len(line_records), 2) if line_records else 0
-            }
-            
-            total_hours += line_hours
-            total_reduction += line_reduction
-        
-        # إحصائيات المجموعات
-        group_stats = {}
-        for group_id in [0, 1]:
-            group_lines = [line for line in self.lines if line.group == group_id]
-            group_hours = sum(line_stats[line.id]['total_hours'] for line in group_lines)
-            group_reduction = sum(line_stats[line.id]['total_reduction'] for line in group_lines)
-            
-            group_stats[group_id] = {
-                'total_hours': round(group_hours, 2),
-                'total_reduction': round(group_reduction, 2),
-                'line_count': len(group_lines),
-                'average_per_line': round(group_hours / len(group_lines), 2) if group_lines else 0
-            }
+            totals = bucket['lines'].get(record.line_id)
+            if totals is None:
+                totals = bucket['lines'][record.line_id] = [0.0, 0.0, 0]
+            totals[0] += record.duration_hours
+            totals[1] += record.load_reduced_mw
+            totals[2] += 1
+        
+        day_keys = sorted(day_buckets)
+        line_info = [(line.id, line.name, line.group) for line in self.lines]
+        group_members = {group_id: list(self.registry.group_ids(group_id)) for group_id in [0, 1]}
+        
+        buckets = [(day, day_buckets[day]) for day in day_keys]
+        
+        if workers is None or workers < 2 or len(periods) < 2:
+            return [
+                _build_period_report(start_date, end_date, report_type, line_info, group_members,
+                                     _slice_buckets(day_keys, buckets, start_date, end_date))
+                for start_date, end_date, report_type in periods
+            ]
         
-        # تفصيل يومي
-        daily_breakdown = {}
-        current_date = start_date
-        while current_date <= end_date:
-            day_records = [r for r in period_records if r.date == current_date]
-            day_hours = sum(r.duration_hours for r in day_records)
-            day_reduction = sum(r.load_reduced_mw for r in day_records)
-            
-            daily_breakdown[current_date] = {
-                'total_hours': round(day_hours, 2),
-                'total_reduction': round(day_reduction, 2),
-                'record_count': len(day_records)
-            }
-            current_date += timedelta(days=1)
-        
-        return PeriodReport(
-            start_date=start_date,
-            end_date=end_date,
-            report_type=report_type,
-            total_hours=round(total_hours, 2),
-            total_reduction=round(total_reduction, 2),
-            line_statistics=line_stats,
-            group_statistics=group_stats,
-            daily_breakdown=daily_breakdown
-        )
+        # تُرسل بيانات الخطوط لكل عملية مرة واحدة عبر initializer، وتُقسم الفترات
+        # (مرتبة زمنياً) إلى دفعة لكل عملية مع أيام نطاق الدفعة فقط
+        order = sorted(range(len(periods)), key=lambda index: periods[index][0])
+        chunk_size = -(-len(order) // workers)
+        chunks = [order[i:i + chunk_size] for i in range(0, len(order), chunk_size)]
+        payloads = []
+        for chunk in chunks:
+            chunk_periods = [periods[index] for index in chunk]
+            chunk_start = min(period[0] for period in chunk_periods)
+            chunk_end = max(period[1] for period in chunk_periods)
+            payloads.append((_slice_buckets(day_keys, buckets, chunk_start, chunk_end), chunk_periods))
+        
+        reports = [None] * len(periods)
+        with ProcessPoolExecutor(max_workers=len(chunks), initializer=_init_report_worker,
+                                 initargs=(line_info, group_members)) as executor:
+            for chunk, chunk_reports in zip(chunks, executor.map(_build_report_chunk, payloads)):
+                for index, report in zip(chunk, chunk_reports):
+                    reports[index] = report
+        return reports
 
     def generate_daily_report(self, target_date: date = None) -> PeriodReport:
         """تقرير يومي"""
@@ -213,8 +314,7 @@ class LoadSheddingManager:
         if target_date is None:
             target_date = date.today()
         
-        days_since_start = (target_date - date(2024, 1, 1)).days
-        return days_since_start % 2
+        return rotation_group(target_date)
     
     def calculate_fair_shedding(self, required_reduction_mw: float, 
                               time_slot: TimeSlot, 
@@ -225,25 +325,58 @@ class LoadSheddingManager:
         if target_date is None:
             target_date = date.today()
         
+        plan = self.plan_fair_shedding(required_reduction_mw, time_slot, target_date)
+        self.apply_shedding_plan(plan, time_slot, target_date)
+        return self.format_plan(plan, time_slot)
+    
+    def apply_shedding_plan(self, plan: List[Tuple[LoadLine, float, float]],
+                            time_slot: TimeSlot, target_date: date):
+        """تنفيذ خطة محسوبة: تحديث الإحصائيات والسجل ثم إبلاغ المستمعين"""
+        self._check_writable()
+        with self._state_lock:
+            # خطة حُسبت قبل إعادة تحميل الخطوط تشير إلى كائنات لم تعد في السجل
+            for line, _, _ in plan:
+                if self.registry.get(line.id) is not line:
+                    raise ValueError(f"الخطة تشير إلى الخط {line.id} الذي لم يعد موجوداً أو تم استبداله")
+            for line, duration_hours, _ in plan:
+                self._update_shedding_stats(line.id, duration_hours, target_date, time_slot)
+        
+        self._notify_lines_changed(
+            [line.id for line, _, _ in plan],
+            {line.group for line, _, _ in plan},
+            {month_key(target_date.month, target_date.year)}
+        )
+    
+    def plan_fair_shedding(self, required_reduction_mw: float, time_slot: TimeSlot,
+                           target_date: date,
+                           projected_hours: Dict[int, float] = None) -> List[Tuple[LoadLine, float, float]]:
+        """
+        حساب خطة التخفيف دون تحديث الإحصائيات
+
+        projected_hours ساعات إضافية متوقعة لكل خط تُضاف إلى ساعات الشهر
+        عند ترتيب الأولوية. تعيد قائمة (الخط، مدة الفصل، الحمل المخفف).
+        """
         current_group = self.get_current_group_schedule(target_date)
         
-        available_lines = [line for line in self.lines 
-                          if line.group == current_group and line.is_active]
+        available_lines = [line for line in self.registry.group_lines(current_group)
+                          if line.is_active]
         
         if not available_lines:
             return []
         
+        monthly_key = month_key(target_date.month, target_date.year)
         priority_queue = []
         for line in available_lines:
             stats = self.stats[line.id]
-            monthly_key = f"{target_date.month}_{target_date.year}"
             monthly_hours = stats.monthly_hours.get(monthly_key, 0)
+            if projected_hours:
+                monthly_hours += projected_hours.get(line.id, 0)
             
             priority = (monthly_hours, line.id)
             
             heapq.heappush(priority_queue, (priority, line))
         
-        shedding_plan = []
+        plan = []
         remaining_reduction = required_reduction_mw
         
         while remaining_reduction > 0 and priority_queue:
@@ -253,18 +386,24 @@ class LoadSheddingManager:
             duration_hours = (line_capacity / line.capacity_mw) * 2
             
             if duration_hours > 0:
-                shedding_plan.append({
-                    'line_id': line.id,
-                    'line_name': line.name,
-                    'duration_hours': round(duration_hours, 2),
-                    'load_reduced_mw': round(line_capacity, 2),
-                    'time_slot': time_slot.value
-                })
-                
+                plan.append((line, duration_hours, line_capacity))
                 remaining_reduction -= line_capacity
-                self._update_shedding_stats(line.id, duration_hours, target_date, time_slot)
         
-        return shedding_plan
+        return plan
+    
+    @staticmethod
+    def format_plan(plan: List[Tuple[LoadLine, float, float]], time_slot: TimeSlot) -> List[Dict]:
+        """تحويل الخطة إلى الصيغة المعروضة"""
+        return [
+            {
+                'line_id': line.id,
+                'line_name': line.name,
+                'duration_hours': round(duration_hours, 2),
+                'load_reduced_mw': round(line_capacity, 2),
+                'time_slot': time_slot.value
+            }
+            for line, duration_hours, line_capacity in plan
+        ]
     
     def _update_shedding_stats(self, line_id: int, duration_hours: float, 
                              target_date: date, time_slot: TimeSlot):
@@ -272,7 +411,7 @@ class LoadSheddingManager:
         stats = self.stats[line_id]
         stats.total_hours += duration_hours
         
-        monthly_key = f"{target_date.month}_{target_date.year}"
+        monthly_key = month_key(target_date.month, target_date.year)
         stats.monthly_hours[monthly_key] = stats.monthly_hours.get(monthly_key, 0) + duration_hours
         stats.last_shedding_time = datetime.now()
         
@@ -281,10 +420,121 @@ class LoadSheddingManager:
             date=target_date,
             time_slot=time_slot,
             duration_hours=duration_hours,
-            load_reduced_mw=self.lines[line_id-1].capacity_mw
+            load_reduced_mw=self.registry.get(line_id).capacity_mw
         )
         self.shedding_history.append(record)
     
+    def import_history_csv(self, filename: str, chunk_size: int = 50000) -> ImportSummary:
+        """
+        استيراد سجلات فصل تاريخية من ملف CSV على دفعات
+
+        الأعمدة المطلوبة: line_id, date, time_slot, duration_hours, load_reduced_mw.
+        تُستبعد الصفوف غير الصالحة أو لخطوط غير معروفة والصفوف المكررة
+        (بما فيها الموجودة مسبقاً في السجل)، وتُحدّث إحصائيات كل دفعة مرة واحدة.
+        """
+        started = time.perf_counter()
+        time_slots = {slot.value: slot for slot in TimeSlot}
+        seen = {
+            (r.line_id, r.date, r.time_slot, r.duration_hours, r.load_reduced_mw)
+            for r in self.shedding_history
+        }
+        date_cache = {}
+        rows_read = rows_imported = rows_invalid = rows_duplicate = 0
+        
+        with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            header = [column.strip() for column in next(reader, [])]
+            try:
+                line_col, date_col, slot_col, hours_col, mw_col = (
+                    header.index(column) for column in
+                    ('line_id', 'date', 'time_slot', 'duration_hours', 'load_reduced_mw')
+                )
+            except ValueError:
+                raise ValueError(f"أعمدة ملف CSV غير صحيحة: {header}")
+            
+            while True:
+                chunk = list(islice(reader, chunk_size))
+                if not chunk:
+                    break
+                rows_read += len(chunk)
+                
+                batch = []
+                for row in chunk:
+                    try:
+                        line_id = int(row[line_col])
+                        date_text = row[date_col]
+                        record_date = date_cache.get(date_text)
+                        if record_date is None:
+                            record_date = date_cache[date_text] = date.fromisoformat(date_text.strip())
+                        time_slot = time_slots[row[slot_col].strip().lower()]
+                        duration_hours = float(row[hours_col])
+                        load_reduced_mw = float(row[mw_col])
+                    except (ValueError, KeyError, IndexError):
+                        rows_invalid += 1
+                        continue
+                    
+                    if (line_id not in self.registry
+                            or not math.isfinite(duration_hours) or duration_hours < 0
+                            or not math.isfinite(load_reduced_mw) or load_reduced_mw < 0):
+                        rows_invalid += 1
+                        continue
+                    
+                    key = (line_id, record_date, time_slot, duration_hours, load_reduced_mw)
+                    if key in seen:
+                        rows_duplicate += 1
+                        continue
+                    seen.add(key)
+                    
+                    batch.append(SheddingRecord(
+                        line_id=line_id,
+                        date=record_date,
+                        time_slot=time_slot,
+                        duration_hours=duration_hours,
+                        load_reduced_mw=load_reduced_mw
+                    ))
+                
+                self._apply_history_batch(batch)
+                rows_imported += len(batch)
+        
+        elapsed = time.perf_counter() - started
+        return ImportSummary(
+            rows_read=rows_read,
+            rows_imported=rows_imported,
+            rows_invalid=rows_invalid,
+            rows_duplicate=rows_duplicate,
+            elapsed_seconds=round(elapsed, 3),
+            rows_per_minute=round(rows_read / elapsed * 60, 1) if elapsed > 0 else 0
+        )
+    
+    def _apply_history_batch(self, records: List[SheddingRecord]):
+        """إضافة دفعة سجلات وتحديث إحصائياتها بخطوة تجميعية واحدة"""
+        if not records:
+            return
+        self._check_writable()
+        
+        total_hours = defaultdict(float)
+        monthly_hours = defaultdict(float)
+        for record in records:
+            total_hours[record.line_id] += record.duration_hours
+            monthly_hours[(record.line_id, month_key(record.date.month, record.date.year))] += record.duration_hours
+        
+        now = datetime.now()
+        with self._state_lock:
+            for line_id, hours in total_hours.items():
+                stats = self.stats[line_id]
+                stats.total_hours += hours
+                stats.last_shedding_time = now
+            for (line_id, monthly_key), hours in monthly_hours.items():
+                stats = self.stats[line_id]
+                stats.monthly_hours[monthly_key] = stats.monthly_hours.get(monthly_key, 0) + hours
+            
+            self.shedding_history.extend(records)
+        self._notify_lines_changed(
+            list(total_hours),
+            {self.registry.get(line_id).group for line_id in total_hours},
+            {monthly_key for _, monthly_key in monthly_hours}
+        )
+    
     def get_line_stats(self, line_id: int) -> Dict:
         """الحصول على إحصائيات خط معين"""
         if line_id not in self.stats:
@@ -302,12 +552,12 @@ class LoadSheddingManager:
     def get_current_month_hours(self, line_id: int) -> float:
         """ساعات الفصل للشهر الحالي"""
         current_date = date.today()
-        monthly_key = f"{current_date.month}_{current_date.year}"
+        monthly_key = month_key(current_date.month, current_date.year)
         return self.stats[line_id].monthly_hours.get(monthly_key, 0)
     
     def get_monthly_report(self, month: int, year: int) -> Dict:
         """تقرير شهري مفصل"""
-        monthly_key = f"{month}_{year}"
+        monthly_key = month_key(month, year)
         total_hours = 0
         line_hours = {}
         
@@ -326,27 +576,67 @@ class LoadSheddingManager:
     
     def set_line_capacity(self, line_id: int, capacity_mw: float):
         """تعيين سعة الخط"""
-        if 1 <= line_id <= len(self.lines):
-            self.lines[line_id-1].capacity_mw = capacity_mw
+        self.bulk_set_capacity({line_id: capacity_mw})
     
     def toggle_line_status(self, line_id: int, is_active: bool):
         """تفعيل/تعطيل خط"""
-        if 1 <= line_id <= len(self.lines):
-            self.lines[line_id-1].is_active = is_active
+        self.bulk_set_status({line_id: is_active})
+    
+    def bulk_set_capacity(self, updates: Dict[int, float]) -> List[int]:
+        """تعيين سعة عدة خطوط دفعة واحدة، وتُتجاهل المعرفات غير الموجودة"""
+        self._check_writable()
+        with self._state_lock:
+            changed, groups = self.registry.set_capacity(updates)
+        self._notify_lines_changed(changed, groups)
+        return changed
+    
+    def bulk_set_status(self, updates: Dict[int, bool]) -> List[int]:
+        """تفعيل/تعطيل عدة خطوط دفعة واحدة"""
+        self._check_writable()
+        with self._state_lock:
+            changed, groups = self.registry.set_status(updates)
+        self._notify_lines_changed(changed, groups)
+        return changed
+    
+    def bulk_set_group(self, updates: Dict[int, int]) -> List[int]:
+        """نقل عدة خطوط بين المجموعات دفعة واحدة"""
+        self._check_writable()
+        with self._state_lock:
+            changed, groups = self.registry.set_group(updates)
+        self._notify_lines_changed(changed, groups)
+        return changed
     
     def save_data(self, filename: str):
         """حفظ البيانات"""
+        self.write_snapshot(self.snapshot(), filename)
+    
+    def snapshot(self) -> Dict:
+        """
+        نسخة متسقة ورخيصة من الخطوط والسجل
+
+        تُنسخ خصائص الخطوط، أما السجل فتُنسخ قائمته فقط لأن السجلات لا تتغير
+        بعد إضافتها. تُحوّل النسخة إلى JSON لاحقاً عبر write_snapshot.
+        """
+        with self._state_lock:
+            return {
+                'lines': [
+                    {
+                        'id': line.id,
+                        'name': line.name,
+                        'group': line.group,
+                        'capacity_mw': line.capacity_mw,
+                        'is_active': line.is_active
+                    }
+                    for line in self.lines
+                ],
+                'shedding_history': list(self.shedding_history)
+            }
+    
+    @staticmethod
+    def write_snapshot(snapshot: Dict, filename: str):
+        """كتابة النسخة إلى ملف مؤقت ثم استبدال ملف البيانات به"""
         data = {
-            'lines': [
-                {
-                    'id': line.id,
-                    'name': line.name,
-                    'group': line.group,
-                    'capacity_mw': line.capacity_mw,
-                    'is_active': line.is_active
-                }
-                for line in self.lines
-            ],
+            'lines': snapshot['lines'],
             'shedding_history': [
                 {
                     'line_id': record.line_id,
@@ -355,31 +645,46 @@ class LoadSheddingManager:
                     'duration_hours': record.duration_hours,
                     'load_reduced_mw': record.load_reduced_mw
                 }
-                for record in self.shedding_history
+                for record in snapshot['shedding_history']
             ]
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # يُنشأ الملف المؤقت بالصلاحيات الافتراضية (وفق umask) وليس 0600 كما في
+        # mkstemp، وإن كان ملف البيانات موجوداً تُنسخ صلاحياته
+        temp_path = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                if os.path.exists(filename):
+                    os.chmod(temp_path, stat.S_IMODE(os.stat(filename).st_mode))
+                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, filename)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
     
     def load_data(self, filename: str):
         """تحميل البيانات"""
+        self._check_writable()
         try:
             with open(filename, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            self.lines = []
+            lines = []
             for line_data in data['lines']:
                 line = LoadLine(
                     id=line_data['id'],
-                    name=line_data['name'],
+                    name=sys.intern(line_data['name']),
                     group=line_data['group'],
                     capacity_mw=line_data['capacity_mw'],
                     is_active=line_data['is_active']
                 )
-                self.lines.append(line)
+                lines.append(line)
             
-            self.shedding_history = []
+            records = []
             for record_data in data['shedding_history']:
                 record = SheddingRecord(
                     line_id=record_data['line_id'],
@@ -388,18 +693,128 @@ class LoadSheddingManager:
                     duration_hours=record_data['duration_hours'],
                     load_reduced_mw=record_data['load_reduced_mw']
                 )
-                self.shedding_history.append(record)
+                records.append(record)
             
-            self._initialize_stats()
-            for record in self.shedding_history:
-                self._update_shedding_stats(
-                    record.line_id, 
-                    record.duration_hours, 
-                    record.date, 
-                    record.time_slot
-                )
+            registry = LineRegistry(lines)
+            stats = self._build_stats(lines, records)
                 
         except FileNotFoundError:
             raise FileNotFoundError("لم يتم العثور على ملف البيانات")
         except Exception as e:
             raise Exception(f"خطأ في تحميل البيانات: {e}")
+        
+        # تُبنى الحالة الجديدة كاملة أولاً، فلا يغير التحميل الفاشل شيئاً
+        with self._state_lock:
+            old_lines = list(self.lines)
+            self.registry = registry
+            self.stats = stats
+            self.shedding_history = records
+        
+        # كل الخطوط استُبدلت، فيُبلغ المستمعون عن كل المجموعات والأشهر
+        affected = old_lines + lines
+        self._notify_lines_changed(
+            sorted({line.id for line in affected}),
+            {line.group for line in affected} | {0, 1}
+        )
+
+
+def _slice_buckets(day_keys: List[date], buckets: List[Tuple[date, Dict]],
+                   start_date: date, end_date: date) -> List[Tuple[date, Dict]]:
+    """أيام السجلات المجمعة الواقعة ضمن فترة"""
+    return buckets[bisect_left(day_keys, start_date):bisect_right(day_keys, end_date)]
+
+
+# بيانات الخطوط المشتركة داخل عمليات التقارير (تُضبط عبر _init_report_worker)
+_worker_line_info: List[Tuple[int, str, int]] = []
+_worker_group_members: Dict[int, List[int]] = {}
+
+
+def _init_report_worker(line_info: List[Tuple[int, str, int]], group_members: Dict[int, List[int]]):
+    global _worker_line_info, _worker_group_members
+    _worker_line_info = line_info
+    _worker_group_members = group_members
+
+
+def _build_report_chunk(payload: Tuple[List[Tuple[date, Dict]], List[Tuple[date, date, ReportType]]]) -> List[PeriodReport]:
+    """بناء تقارير دفعة من الفترات داخل عملية فرعية"""
+    buckets, periods = payload
+    day_keys = [day for day, _ in buckets]
+    return [
+        _build_period_report(start_date, end_date, report_type, _worker_line_info, _worker_group_members,
+                             _slice_buckets(day_keys, buckets, start_date, end_date))
+        for start_date, end_date, report_type in periods
+    ]
+
+
+def _build_period_report(start_date: date, end_date: date, report_type: ReportType,
+                         line_info: List[Tuple[int, str, int]],
+                         group_members: Dict[int, List[int]],
+                         buckets: List[Tuple[date, Dict]]) -> PeriodReport:
+    """بناء تقرير فترة من السجلات المجمعة حسب اليوم"""
+    
+    # تجميع ساعات وأحمال كل خط على أيام الفترة
+    line_totals = defaultdict(lambda: [0.0, 0.0, 0])
+    for _, bucket in buckets:
+        for line_id, (hours, reduction, count) in bucket['lines'].items():
+            totals = line_totals[line_id]
+            totals[0] += hours
+            totals[1] += reduction
+            totals[2] += count
+    
+    # إحصائيات الخطوط
+    line_stats = {}
+    total_hours = 0
+    total_reduction = 0
+    
+    for line_id, line_name, group in line_info:
+        line_hours, line_reduction, line_count = line_totals.get(line_id, (0, 0, 0))
+        
+        line_stats[line_id] = {
+            'line_name': line_name,
+            'group': group,
+            'total_hours': round(line_hours, 2),
+            'total_reduction': round(line_reduction, 2),
+            'shedding_count': line_count,
+            'average_duration': round(line_hours / line_count, 2) if line_count else 0
+        }
+        
+        total_hours += line_hours
+        total_reduction += line_reduction
+    
+    # إحصائيات المجموعات
+    group_stats = {}
+    for group_id, group_lines in group_members.items():
+        group_hours = sum(line_stats[line_id]['total_hours'] for line_id in group_lines)
+        group_reduction = sum(line_stats[line_id]['total_reduction'] for line_id in group_lines)
+        
+        group_stats[group_id] = {
+            'total_hours': round(group_hours, 2),
+            'total_reduction': round(group_reduction, 2),
+            'line_count': len(group_lines),
+            'average_per_line': round(group_hours / len(group_lines), 2) if group_lines else 0
+        }
+    
+    # تفصيل يومي
+    day_index = dict(buckets)
+    daily_breakdown = {}
+    current_date = start_date
+    while current_date <= end_date:
+        bucket = day_index.get(current_date)
+        
+        daily_breakdown[current_date] = {
+            'total_hours': round(bucket['hours'], 2) if bucket else 0,
+            'total_reduction': round(bucket['reduction'], 2) if bucket else 0,
+            'record_count': bucket['count'] if bucket else 0
+        }
+        current_date += timedelta(days=1)
+    
+    return PeriodReport(
+        start_date=start_date,
+        end_date=end_date,
+        report_type=report_type,
+        total_hours=round(total_hours, 2),
+        total_reduction=round(total_reduction, 2),
+        line_statistics=line_stats,
+        group_statistics=group_stats,
+        daily_breakdown=daily_breakdown
+    )
@@ -0,0 +1,198 @@
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import List, Dict, Optional
+from ..models.models import PeriodReport, ReportType
+from .load_manager import LoadSheddingManager
+
+class RegionManager:
+    """
+    استضافة عدة شبكات (مناطق) مستقلة في عملية واحدة
+
+    تُحمّل بيانات كل منطقة عند أول استخدام، وتُخرج المناطق الأقل استخداماً
+    من الذاكرة (بعد حفظها) عندما يتجاوز مجموع السجلات المحمّلة الحد المسموح.
+    جداول التناوب ومفاتيح الأشهر وأسماء الخطوط مشتركة بين كل المناطق.
+
+    المدير الذي يعيده get() صالح حتى الوصول لمنطقة أخرى فقط؛ إذا أُخرج بعد
+    ذلك يُفصل ويرفض أي تعديل. للاحتفاظ به مدة أطول يُستخدم use()، كما لا
+    تُخرج المناطق المرتبط بها مستمعون (أفق جدولة أو حفظ دوري).
+    """
+    def __init__(self, data_dir: str = 'data/regions',
+                 max_resident_records: int = 1_000_000,
+                 save_on_evict: bool = True):
+        self.data_dir = data_dir
+        self.max_resident_records = max_resident_records
+        self.save_on_evict = save_on_evict
+        self._regions: Dict[str, str] = {}
+        self._loaded: "OrderedDict[str, LoadSheddingManager]" = OrderedDict()
+        self._pins: Dict[str, int] = {}
+        self.last_evict_error: Optional[str] = None
+
+    def add_region(self, name: str, data_file: str = None, create: bool = False):
+        """
+        تسجيل منطقة دون تحميل بياناتها
+
+        إذا كان ملف المنطقة غير موجود يُنشأ ملف افتراضي عند create=True فقط،
+        وإلا يفشل تحميلها لاحقاً.
+        """
+        data_file = data_file or os.path.join(self.data_dir, f"{name}.json")
+        if create and not os.path.exists(data_file):
+            LoadSheddingManager(data_file=data_file, verbose=False, auto_load=False).initialize_load_data(data_file)
+        self._regions[name] = data_file
+
+    def discover_regions(self) -> List[str]:
+        """تسجيل كل ملفات المناطق الموجودة في مجلد البيانات"""
+        if os.path.isdir(self.data_dir):
+            for filename in sorted(os.listdir(self.data_dir)):
+                if filename.endswith('.json'):
+                    self.add_region(filename[:-len('.json')])
+        return self.region_names
+
+    @property
+    def region_names(self) -> List[str]:
+        return list(self._regions)
+
+    @property
+    def resident_records(self) -> int:
+        """عدد سجلات الفصل المحمّلة في الذاكرة لكل المناطق"""
+        return sum(len(manager.shedding_history) for manager in self._loaded.values())
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._loaded
+
+    def get(self, name: str) -> LoadSheddingManager:
+        """الحصول على مدير منطقة، مع تحميله عند الحاجة"""
+        if name not in self._regions:
+            raise KeyError(f"المنطقة {name} غير مسجلة")
+
+        manager = self._loaded.get(name)
+        if manager is None:
+            # يرفع استثناء لملف مفقود أو تالف، فلا تُسجل المنطقة كمحمّلة ولا تُحفظ فوق ملفها
+            manager = LoadSheddingManager.from_data_file(self._regions[name])
+            self._loaded[name] = manager
+        self._loaded.move_to_end(name)
+
+        self._evict_over_budget(keep=name)
+        return manager
+
+    @contextmanager
+    def use(self, name: str):
+        """استخدام مدير منطقة مع منع إخراجه حتى نهاية الكتلة"""
+        manager = self.get(name)
+        self._pins[name] = self._pins.get(name, 0) + 1
+        try:
+            yield manager
+        finally:
+            self._pins[name] -= 1
+            if not self._pins[name]:
+                del self._pins[name]
+            self._evict_over_budget()
+
+    def is_pinned(self, name: str) -> bool:
+        """هل المنطقة قيد الاستخدام أو مرتبط بها مستمعون"""
+        manager = self._loaded.get(name)
+        return name in self._pins or (manager is not None and manager.has_change_listeners())
+
+    def evict(self, name: str):
+        """إخراج منطقة من الذاكرة بعد حفظها؛ إذا فشل الحفظ تبقى المنطقة محمّلة"""
+        if self.is_pinned(name):
+            raise RuntimeError(f"المنطقة {name} قيد الاستخدام ولا يمكن إخراجها")
+        manager = self._loaded.get(name)
+        if manager is None:
+            return
+        if self.save_on_evict:
+            manager.save_data(manager.data_file)
+        del self._loaded[name]
+        manager.detach(f"تم إخراج المنطقة {name} من الذاكرة")
+
+    def save_all(self):
+        """حفظ كل المناطق المحمّلة"""
+        for manager in self._loaded.values():
+            manager.save_data(manager.data_file)
+
+    def _evict_over_budget(self, keep: str = None):
+        """
+        إخراج الأقدم استخداماً حتى يعود مجموع السجلات ضمن الحد
+
+        فشل حفظ منطقة لا يُفشل العملية التي طلبت منطقة أخرى: تبقى المنطقة
+        محمّلة (فوق الحد) ويُسجل الخطأ في last_evict_error.
+        """
+        resident = self.resident_records
+        for name in list(self._loaded):
+            if resident <= self.max_resident_records:
+                break
+            if name == keep or self.is_pinned(name):
+                continue
+            records = len(self._loaded[name].shedding_history)
+            try:
+                self.evict(name)
+            except Exception as e:
+                self.last_evict_error = f"{name}: {e}"
+                continue
+            resident -= records
+
+    def generate_regions_report(self, start_date: date, end_date: date,
+                                report_type: ReportType = ReportType.CUSTOM,
+                                workers: int = None) -> Dict[str, PeriodReport]:
+        """
+        تقرير فترة لكل منطقة
+
+        المناطق المحمّلة تُحسب من الذاكرة، وغير المحمّلة تُقرأ من ملفاتها
+        (على عدة عمليات عند تحديد workers > 1) دون إضافتها للذاكرة.
+        """
+        reports = {}
+        pending = []
+        for name, data_file in self._regions.items():
+            manager = self._loaded.get(name)
+            if manager is not None:
+                reports[name] = manager.generate_period_report(start_date, end_date, report_type)
+            else:
+                pending.append((name, data_file))
+
+        if workers is not None and workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(
+                    _load_region_report,
+                    [data_file for _, data_file in pending],
+                    [start_date] * len(pending),
+                    [end_date] * len(pending),
+                    [report_type] * len(pending)
+                )
+                reports.update(zip([name for name, _ in pending], results))
+        else:
+            for name, data_file in pending:
+                reports[name] = _load_region_report(data_file, start_date, end_date, report_type)
+
+        return {name: reports[name] for name in self._regions}
+
+    def get_aggregate_report(self, start_date: date, end_date: date,
+                             report_type: ReportType = ReportType.CUSTOM,
+                             workers: int = None) -> Dict:
+        """تقرير مجمّع لكل المناطق"""
+        reports = self.generate_regions_report(start_date, end_date, report_type, workers)
+        total_hours = sum(report.total_hours for report in reports.values())
+        total_reduction = sum(report.total_reduction for report in reports.values())
+
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'report_type': report_type.value,
+            'total_hours': round(total_hours, 2),
+            'total_reduction': round(total_reduction, 2),
+            'regions': {
+                name: {
+                    'total_hours': report.total_hours,
+                    'total_reduction': report.total_reduction
+                }
+                for name, report in reports.items()
+            }
+        }
+
+
+def _load_region_report(data_file: str, start_date: date, end_date: date,
+                        report_type: ReportType) -> PeriodReport:
+    """قراءة منطقة من ملفها وإنشاء تقرير فترة لها دون أي كتابة على القرص"""
+    manager = LoadSheddingManager.from_data_file(data_file)
+    return manager.generate_period_report(start_date, end_date, report_type)
@@ -0,0 +1,165 @@
+from datetime import date, timedelta
+from typing import List, Dict, Optional, Set, FrozenSet, Tuple
+from collections import defaultdict
+from ..models.models import TimeSlot
+from ..utils.calendar_cache import month_key
+
+SlotKey = Tuple[date, TimeSlot]
+ChainKey = Tuple[int, str]
+
+class ScheduleHorizon:
+    """
+    خطط تخفيف محسوبة مسبقاً للأيام القادمة
+
+    تُحسب خطة كل فترة من توقع الطلب (forecast) دون تحديث الإحصائيات.
+    الفترات التي تخص المجموعة نفسها في الشهر نفسه تشكّل سلسلة، وتُضاف
+    ساعات الفترات السابقة في السلسلة إلى أولوية الفترات اللاحقة. عند تغير
+    خط أو سعة أو توقع يُعاد تخطيط السلاسل المتأثرة فقط.
+    """
+    def __init__(self, manager, days: int = 7,
+                 forecast: Dict[SlotKey, float] = None,
+                 start_date: date = None):
+        self.manager = manager
+        self.days = days
+        self.start_date = start_date or date.today()
+        self.forecast: Dict[SlotKey, float] = dict(forecast or {})
+
+        self._plans: Dict[SlotKey, List[Dict]] = {}
+        self._raw_plans: Dict[SlotKey, List[Tuple]] = {}
+        self._chains: Dict[ChainKey, List[SlotKey]] = {}
+        self._positions: Dict[SlotKey, Tuple[ChainKey, int]] = {}
+        self._committed: Set[SlotKey] = set()
+        self.replan_count = 0
+
+        self._build_chains()
+        for chain in self._chains:
+            self._replan_chain(chain)
+
+        manager.add_change_listener(self._on_lines_changed)
+
+    def _build_chains(self):
+        """تقسيم فترات الأفق إلى سلاسل حسب المجموعة والشهر"""
+        chains = defaultdict(list)
+        for offset in range(self.days):
+            target_date = self.start_date + timedelta(days=offset)
+            group = self.manager.get_current_group_schedule(target_date)
+            for time_slot in TimeSlot:
+                if (target_date, time_slot) not in self._committed:
+                    chains[(group, month_key(target_date.month, target_date.year))].append((target_date, time_slot))
+
+        self._chains = dict(chains)
+        self._positions = {
+            key: (chain, index)
+            for chain, keys in self._chains.items()
+            for index, key in enumerate(keys)
+        }
+
+    def _replan_chain(self, chain: ChainKey, start_index: int = 0):
+        """إعادة تخطيط سلسلة بدءاً من فترة معينة"""
+        keys = self._chains[chain]
+
+        projected_hours = defaultdict(float)
+        for key in keys[:start_index]:
+            for line, duration_hours, _ in self._raw_plans[key]:
+                projected_hours[line.id] += duration_hours
+
+        for key in keys[start_index:]:
+            target_date, time_slot = key
+            raw_plan = self.manager.plan_fair_shedding(
+                self.forecast.get(key, 0), time_slot, target_date, projected_hours
+            )
+            for line, duration_hours, _ in raw_plan:
+                projected_hours[line.id] += duration_hours
+
+            self._raw_plans[key] = raw_plan
+            self._plans[key] = self.manager.format_plan(raw_plan, time_slot)
+            self.replan_count += 1
+
+    def _on_lines_changed(self, line_ids: List[int], groups: Set[int],
+                          month_keys: Optional[Set[str]] = None):
+        """إعادة تخطيط سلاسل المجموعات (والأشهر) المتأثرة بالتغيير"""
+        for chain in self._chains:
+            group, chain_month = chain
+            if group in groups and (month_keys is None or chain_month in month_keys):
+                self._replan_chain(chain)
+
+    def close(self):
+        """إيقاف متابعة تغييرات المدير"""
+        self.manager.remove_change_listener(self._on_lines_changed)
+
+    @property
+    def committed_slots(self) -> FrozenSet[SlotKey]:
+        """الفترات المنفذة التي لم تعد ضمن الخطط"""
+        return frozenset(self._committed)
+
+    def chain_slots(self, target_date: date, time_slot: TimeSlot) -> List[SlotKey]:
+        """فترات السلسلة التي تنتمي لها فترة معينة مرتبة زمنياً"""
+        position = self._positions.get((target_date, time_slot))
+        return list(self._chains[position[0]]) if position else []
+
+    def group_slots(self, group: int) -> List[SlotKey]:
+        """فترات الأفق غير المنفذة لمجموعة معينة"""
+        return [
+            key
+            for (chain_group, _), keys in self._chains.items() if chain_group == group
+            for key in keys
+        ]
+
+    def get_plan(self, target_date: date, time_slot: TimeSlot) -> Optional[List[Dict]]:
+        """خطة فترة معينة، أو None إذا كانت خارج الأفق"""
+        return self._plans.get((target_date, time_slot))
+
+    def update_forecast(self, updates: Dict[SlotKey, float]):
+        """تحديث توقع الطلب لعدة فترات وإعادة تخطيط ما يتأثر بها فقط"""
+        start_indexes = {}
+        for key, demand_mw in updates.items():
+            if self.forecast.get(key) == demand_mw:
+                continue
+            self.forecast[key] = demand_mw
+
+            position = self._positions.get(key)
+            if position is None:
+                continue
+            chain, index = position
+            start_indexes[chain] = min(index, start_indexes.get(chain, index))
+
+        for chain, index in start_indexes.items():
+            self._replan_chain(chain, index)
+
+    def commit(self, target_date: date, time_slot: TimeSlot) -> List[Dict]:
+        """
+        تنفيذ الخطة المحسوبة لفترة معينة وتحديث الإحصائيات
+
+        تُزال الفترة من الأفق قبل تحديث الإحصائيات، فتصبح ساعاتها جزءاً من
+        الإحصائيات الأساسية لباقي فترات سلسلتها.
+        """
+        key = (target_date, time_slot)
+        if key not in self._positions:
+            raise KeyError(f"الفترة {target_date} {time_slot.value} خارج أفق الجدولة")
+
+        plan = self._plans.pop(key)
+        raw_plan = self._raw_plans.pop(key)
+        self._committed.add(key)
+        self._build_chains()
+
+        self.manager.apply_shedding_plan(raw_plan, time_slot, target_date)
+        return plan
+
+    def advance(self, start_date: date = None):
+        """تحريك بداية الأفق وحساب الأيام الجديدة فقط"""
+        old_chains = self._chains
+        self.start_date = start_date or date.today()
+        self._build_chains()
+
+        self._committed = {key for key in self._committed if key[0] >= self.start_date}
+        self._plans = {key: plan for key, plan in self._plans.items() if key in self._positions}
+        self._raw_plans = {key: plan for key, plan in self._raw_plans.items() if key in self._positions}
+
+        for chain, keys in self._chains.items():
+            old_keys = old_chains.get(chain, [])
+            unchanged = 0
+            while (unchanged < len(keys) and unchanged < len(old_keys)
+                   and keys[unchanged] == old_keys[unchanged]):
+                unchanged += 1
+            if unchanged < len(keys):
+                self._replan_chain(chain, unchanged)
@@ -49,3 +49,12 @@ class PeriodReport:
     line_statistics: Dict[int, Dict]
     group_statistics: Dict[int, Dict]
     daily_breakdown: Dict[date, Dict]
+
+@dataclass
+class ImportSummary:
+    rows_read: int
+    rows_imported: int
+    rows_invalid: int
+    rows_duplicate: int
+    elapsed_seconds: float
+    rows_per_minute: float
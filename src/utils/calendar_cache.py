@@ -0,0 +1,16 @@
+import sys
+from datetime import date
+from functools import lru_cache
+
+# تاريخ بداية التناوب بين المجموعتين
+ROTATION_EPOCH = date(2024, 1, 1)
+
+@lru_cache(maxsize=None)
+def rotation_group(target_date: date) -> int:
+    """المجموعة المقرر تخفيفها في تاريخ معين (جدول مشترك بين كل الشبكات)"""
+    return (target_date - ROTATION_EPOCH).days % 2
+
+@lru_cache(maxsize=None)
+def month_key(month: int, year: int) -> str:
+    """مفتاح الشهر المستخدم في الإحصائيات، نسخة واحدة مشتركة لكل شهر"""
+    return sys.intern(f"{month}_{year}")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# إضافة جذر المشروع إلى المسار كما في main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
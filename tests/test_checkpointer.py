@@ -0,0 +1,130 @@
+import json
+import os
+import time
+from datetime import date
+
+import pytest
+
+from src.core.checkpointer import Checkpointer
+from src.core.load_manager import LoadSheddingManager
+from src.models.models import TimeSlot
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return LoadSheddingManager(data_file=str(tmp_path / 'load_data.json'), verbose=False)
+
+
+def test_change_threshold_triggers_checkpoint(manager, tmp_path):
+    target = str(tmp_path / 'checkpoint.json')
+    checkpointer = Checkpointer(manager, target, interval_seconds=None, change_threshold=2)
+    checkpointer.start()
+    try:
+        manager.calculate_fair_shedding(15, TimeSlot.MORNING, date(2024, 1, 1))
+        manager.calculate_fair_shedding(15, TimeSlot.EVENING, date(2024, 1, 1))
+        assert wait_for(lambda: checkpointer.checkpoint_count >= 1)
+    finally:
+        checkpointer.close()
+
+    restored = LoadSheddingManager.from_data_file(target)
+    assert len(restored.shedding_history) == len(manager.shedding_history)
+
+
+def test_failed_checkpoint_backs_off_and_retries(manager, tmp_path):
+    directory = tmp_path / 'missing'
+    target = str(directory / 'checkpoint.json')
+    checkpointer = Checkpointer(manager, target, interval_seconds=0.01, change_threshold=1,
+                                retry_seconds=0.1, max_retry_seconds=0.4)
+    checkpointer.start()
+    try:
+        manager.calculate_fair_shedding(15, TimeSlot.MORNING, date(2024, 1, 1))
+        assert wait_for(lambda: checkpointer.failure_count >= 1)
+
+        time.sleep(0.5)
+        # بدون تأجيل كانت المحاولات بالآلاف
+        assert checkpointer.failure_count <= 5
+        assert checkpointer.pending_changes == 1
+        assert checkpointer.get_metrics()['last_error']
+
+        os.makedirs(directory)
+        assert wait_for(lambda: checkpointer.checkpoint_count == 1)
+        assert checkpointer.consecutive_failures == 0
+        assert checkpointer.pending_changes == 0
+    finally:
+        checkpointer.close(flush=False)
+
+    assert len(LoadSheddingManager.from_data_file(target).shedding_history) == len(manager.shedding_history)
+
+
+def test_write_keeps_existing_file_mode(manager, tmp_path):
+    target = str(tmp_path / 'load_data.json')
+    os.chmod(target, 0o640)
+    manager.save_data(target)
+    assert os.stat(target).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ['load_data.json']
+
+
+def test_close_removes_listener(manager, tmp_path):
+    checkpointer = Checkpointer(manager, str(tmp_path / 'checkpoint.json'))
+    checkpointer.close(flush=False)
+    manager.toggle_line_status(1, False)
+    assert checkpointer.pending_changes == 0
+    assert not manager.has_change_listeners()
+
+
+def test_failed_reload_keeps_previous_state(manager, tmp_path):
+    manager.calculate_fair_shedding(15, TimeSlot.MORNING, date(2024, 1, 1))
+    history = list(manager.shedding_history)
+    stats = {line_id: manager.get_line_stats(line_id)['total_hours'] for line_id in manager.stats}
+
+    broken = str(tmp_path / 'broken.json')
+    manager.save_data(broken)
+    with open(broken, encoding='utf-8') as f:
+        data = json.load(f)
+    data['shedding_history'][0]['line_id'] = 999
+    with open(broken, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+    with pytest.raises(Exception):
+        manager.load_data(broken)
+    assert manager.shedding_history == history
+    assert {line_id: manager.get_line_stats(line_id)['total_hours'] for line_id in manager.stats} == stats
+
+
+def test_reload_drops_stale_stats(manager, tmp_path):
+    manager.calculate_fair_shedding(15, TimeSlot.MORNING, date(2024, 1, 1))
+    snapshot = manager.snapshot()
+    snapshot['lines'] = [line for line in snapshot['lines'] if line['id'] != 1]
+    snapshot['shedding_history'] = []
+    smaller = str(tmp_path / 'smaller.json')
+    LoadSheddingManager.write_snapshot(snapshot, smaller)
+
+    manager.load_data(smaller)
+    assert 1 not in manager.stats
+    assert all(stats.total_hours == 0 for stats in manager.stats.values())
+
+
+def test_requested_checkpoint_skips_backoff(manager, tmp_path):
+    directory = tmp_path / 'missing'
+    checkpointer = Checkpointer(manager, str(directory / 'checkpoint.json'), interval_seconds=None,
+                                change_threshold=1, retry_seconds=60, max_retry_seconds=60)
+    checkpointer.start()
+    try:
+        manager.calculate_fair_shedding(15, TimeSlot.MORNING, date(2024, 1, 1))
+        assert wait_for(lambda: checkpointer.failure_count == 1)
+
+        os.makedirs(directory)
+        checkpointer.request_checkpoint()
+        assert wait_for(lambda: checkpointer.checkpoint_count == 1)
+        assert checkpointer.consecutive_failures == 0
+    finally:
+        checkpointer.close()
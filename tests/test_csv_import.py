@@ -0,0 +1,99 @@
+from datetime import date
+
+import pytest
+
+from src.core.load_manager import LoadSheddingManager
+from src.models.models import TimeSlot
+
+HEADER = 'line_id,date,time_slot,duration_hours,load_reduced_mw\n'
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return LoadSheddingManager(data_file=str(tmp_path / 'load_data.json'), verbose=False)
+
+
+def write_csv(tmp_path, rows, header=HEADER, encoding='utf-8'):
+    path = tmp_path / 'history.csv'
+    path.write_text(header + ''.join(row + '\n' for row in rows), encoding=encoding)
+    return str(path)
+
+
+def test_import_updates_history_and_stats(manager, tmp_path):
+    path = write_csv(tmp_path, [
+        '1,2024-01-05,morning,2.0,10.0',
+        '1,2024-02-05,evening,1.5,7.5',
+        '11,2024-01-06,Evening,0.5,2.5',
+    ])
+    summary = manager.import_history_csv(path)
+
+    assert (summary.rows_read, summary.rows_imported, summary.rows_invalid, summary.rows_duplicate) == (3, 3, 0, 0)
+    assert len(manager.shedding_history) == 3
+    assert manager.stats[1].total_hours == 3.5
+    assert manager.stats[1].monthly_hours == {'1_2024': 2.0, '2_2024': 1.5}
+    assert manager.shedding_history[2].time_slot is TimeSlot.EVENING
+
+
+@pytest.mark.parametrize('row', [
+    'x,2024-01-05,morning,2.0,10.0',
+    '1,2024-13-05,morning,2.0,10.0',
+    '1,2024-01-05,noon,2.0,10.0',
+    '1,2024-01-05,morning,abc,10.0',
+    '1,2024-01-05,morning',
+    '1,2024-01-05,morning,-1,10.0',
+    '1,2024-01-05,morning,nan,10.0',
+    '1,2024-01-05,morning,2.0,inf',
+    '1,2024-01-05,morning,-inf,10.0',
+    '999,2024-01-05,morning,2.0,10.0',
+])
+def test_invalid_rows_are_counted_and_skipped(manager, tmp_path, row):
+    path = write_csv(tmp_path, [row, '2,2024-01-05,morning,1.0,5.0'])
+    summary = manager.import_history_csv(path)
+
+    assert summary.rows_invalid == 1
+    assert summary.rows_imported == 1
+    assert manager.stats[1].total_hours == 0
+    assert manager.stats[2].total_hours == 1.0
+
+
+def test_duplicates_in_file_and_existing_history(manager, tmp_path):
+    manager.calculate_fair_shedding(10, TimeSlot.MORNING, date(2024, 1, 1))
+    existing = manager.shedding_history[0]
+    existing_row = (f"{existing.line_id},{existing.date.isoformat()},{existing.time_slot.value},"
+                    f"{existing.duration_hours},{existing.load_reduced_mw}")
+
+    path = write_csv(tmp_path, [
+        '3,2024-01-07,morning,1.0,5.0',
+        '3,2024-01-07,morning,1.0,5.0',
+        existing_row,
+    ])
+    summary = manager.import_history_csv(path)
+
+    assert summary.rows_duplicate == 2
+    assert summary.rows_imported == 1
+    assert len(manager.shedding_history) == 2
+
+
+def test_chunk_boundaries(manager, tmp_path):
+    rows = [f'{i % 20 + 1},2024-03-{i % 28 + 1:02d},morning,0.5,1.0' for i in range(53)]
+    # تكرار عبر حدود الدفعات
+    rows.append(rows[0])
+    path = write_csv(tmp_path, rows)
+
+    summary = manager.import_history_csv(path, chunk_size=7)
+
+    assert summary.rows_read == 54
+    assert summary.rows_imported == 53
+    assert summary.rows_duplicate == 1
+    assert sum(stats.total_hours for stats in manager.stats.values()) == pytest.approx(26.5)
+
+
+def test_bom_header_is_accepted(manager, tmp_path):
+    path = write_csv(tmp_path, ['1,2024-01-05,morning,2.0,10.0'], encoding='utf-8-sig')
+    assert manager.import_history_csv(path).rows_imported == 1
+
+
+def test_missing_columns_raise(manager, tmp_path):
+    path = write_csv(tmp_path, ['1,2024-01-05'], header='line_id,date\n')
+    with pytest.raises(ValueError):
+        manager.import_history_csv(path)
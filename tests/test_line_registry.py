@@ -0,0 +1,101 @@
+import json
+from datetime import date
+
+import pytest
+
+from src.core.line_registry import LineRegistry
+from src.core.load_manager import LoadSheddingManager
+from src.models.models import LoadLine, TimeSlot
+
+
+def make_lines(ids, group_of=lambda line_id: line_id % 2):
+    return [LoadLine(id=line_id, name=f"Line_{line_id}", group=group_of(line_id), capacity_mw=10.0)
+            for line_id in ids]
+
+
+SPARSE_IDS = [3, 7, 100, 204, 1001]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    data_file = tmp_path / 'load_data.json'
+    data = {
+        'lines': [
+            {'id': line_id, 'name': f"Line_{line_id}", 'group': 0, 'capacity_mw': 10.0, 'is_active': True}
+            for line_id in SPARSE_IDS
+        ],
+        'shedding_history': []
+    }
+    data_file.write_text(json.dumps(data), encoding='utf-8')
+    return LoadSheddingManager.from_data_file(str(data_file))
+
+
+def test_sparse_ids_lookup_and_membership():
+    registry = LineRegistry(make_lines(SPARSE_IDS))
+
+    assert registry.get(100).id == 100
+    assert registry.get(1) is None
+    assert 204 in registry and 5 not in registry
+    assert registry.group_ids(0) == {100, 204}
+    assert registry.group_ids(1) == {3, 7, 1001}
+    assert registry.group_ids(5) == frozenset()
+
+
+def test_group_ids_is_read_only():
+    registry = LineRegistry(make_lines(SPARSE_IDS))
+    with pytest.raises(AttributeError):
+        registry.group_ids(0).add(12345)
+    assert 12345 not in registry.group_ids(0)
+
+
+def test_rebuild_with_duplicate_id_leaves_registry_unchanged():
+    registry = LineRegistry(make_lines([1, 2, 3]))
+    with pytest.raises(ValueError):
+        registry.rebuild(make_lines([1, 2, 2, 3]))
+
+    assert [line.id for line in registry.lines] == [1, 2, 3]
+    assert registry.group_ids(1) == {1, 3}
+
+
+def test_bulk_setters_return_only_changed_lines():
+    registry = LineRegistry(make_lines(SPARSE_IDS))
+
+    changed, groups = registry.set_capacity({3: 10.0, 7: 12.0, 999: 5.0})
+    assert changed == [7] and groups == {1}
+    assert registry.get(7).capacity_mw == 12.0
+
+    changed, groups = registry.set_status({3: True, 100: False})
+    assert changed == [100] and groups == {0}
+    assert not registry.get(100).is_active
+
+
+def test_set_group_moves_membership():
+    registry = LineRegistry(make_lines(SPARSE_IDS))
+
+    changed, groups = registry.set_group({3: 0, 100: 0, 999: 1})
+
+    assert changed == [3]
+    assert groups == {0, 1}
+    assert registry.get(3).group == 0
+    assert registry.group_ids(0) == {3, 100, 204}
+    assert 3 not in registry.group_ids(1)
+    assert {line.id for line in registry.group_lines(0)} == {3, 100, 204}
+
+
+def test_manager_notifies_once_per_batch(manager):
+    calls = []
+    manager.add_change_listener(lambda line_ids, groups, month_keys: calls.append((sorted(line_ids), groups, month_keys)))
+
+    assert sorted(manager.bulk_set_capacity({line_id: 5.0 for line_id in SPARSE_IDS})) == SPARSE_IDS
+    assert manager.bulk_set_status({3: True}) == []
+    assert manager.bulk_set_group({7: 1, 100: 1}) == [7, 100]
+
+    assert calls == [(SPARSE_IDS, {0}, None), ([7, 100], {0, 1}, None)]
+
+
+def test_planning_with_sparse_ids(manager):
+    manager.toggle_line_status(204, False)
+    plan = manager.calculate_fair_shedding(25, TimeSlot.MORNING, date(2024, 1, 1))
+
+    assert [item['line_id'] for item in plan] == [3, 7, 100]
+    assert manager.shedding_history[-1].load_reduced_mw == 10.0
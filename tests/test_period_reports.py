@@ -0,0 +1,111 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from src.core.load_manager import LoadSheddingManager
+from src.models.models import ReportType
+
+
+def reference_period_report(manager, start_date, end_date):
+    """التقرير كما كان يُحسب بمسح السجل لكل فترة"""
+    period_records = [r for r in manager.shedding_history if start_date <= r.date <= end_date]
+
+    line_stats = {}
+    total_hours = 0
+    total_reduction = 0
+    for line in manager.lines:
+        line_records = [r for r in period_records if r.line_id == line.id]
+        line_hours = sum(r.duration_hours for r in line_records)
+        line_reduction = sum(r.load_reduced_mw for r in line_records)
+        line_stats[line.id] = {
+            'line_name': line.name,
+            'group': line.group,
+            'total_hours': round(line_hours, 2),
+            'total_reduction': round(line_reduction, 2),
+            'shedding_count': len(line_records),
+            'average_duration': round(line_hours / len(line_records), 2) if line_records else 0
+        }
+        total_hours += line_hours
+        total_reduction += line_reduction
+
+    group_stats = {}
+    for group_id in [0, 1]:
+        group_lines = [line for line in manager.lines if line.group == group_id]
+        group_hours = sum(line_stats[line.id]['total_hours'] for line in group_lines)
+        group_stats[group_id] = {
+            'total_hours': round(group_hours, 2),
+            'total_reduction': round(sum(line_stats[line.id]['total_reduction'] for line in group_lines), 2),
+            'line_count': len(group_lines),
+            'average_per_line': round(group_hours / len(group_lines), 2) if group_lines else 0
+        }
+
+    daily_breakdown = {}
+    current_date = start_date
+    while current_date <= end_date:
+        day_records = [r for r in period_records if r.date == current_date]
+        daily_breakdown[current_date] = {
+            'total_hours': round(sum(r.duration_hours for r in day_records), 2),
+            'total_reduction': round(sum(r.load_reduced_mw for r in day_records), 2),
+            'record_count': len(day_records)
+        }
+        current_date += timedelta(days=1)
+
+    return round(total_hours, 2), round(total_reduction, 2), line_stats, group_stats, daily_breakdown
+
+
+@pytest.fixture
+def manager(tmp_path):
+    data_file = str(tmp_path / 'load_data.json')
+    LoadSheddingManager(data_file=data_file, verbose=False)
+    with open(data_file, encoding='utf-8') as f:
+        data = json.load(f)
+
+    # سجلات في أيام متفرقة فقط، حتى تتضمن الفترات أياماً بلا سجلات
+    data['shedding_history'] = [
+        {
+            'line_id': line_id,
+            'date': (date(2024, 1, 1) + timedelta(days=day)).isoformat(),
+            'time_slot': 'morning' if day % 2 else 'evening',
+            'duration_hours': 0.25 * (line_id % 4 + 1),
+            'load_reduced_mw': 2.5 * (day % 5 + 1)
+        }
+        for day in range(0, 120, 3)
+        for line_id in (1, 4, 12, 17)
+    ]
+    with open(data_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    return LoadSheddingManager.from_data_file(data_file)
+
+
+PERIODS = [
+    (date(2024, 1, 1), date(2024, 1, 31), ReportType.MONTHLY),
+    (date(2024, 1, 15), date(2024, 2, 14), ReportType.CUSTOM),
+    (date(2024, 2, 5), date(2024, 2, 11), ReportType.WEEKLY),
+    (date(2024, 2, 2), date(2024, 2, 2), ReportType.DAILY),
+    (date(2024, 6, 1), date(2024, 6, 30), ReportType.MONTHLY),
+    (date(2023, 12, 20), date(2024, 4, 30), ReportType.CUSTOM),
+]
+
+
+def as_tuple(report):
+    return (report.total_hours, report.total_reduction, report.line_statistics,
+            report.group_statistics, report.daily_breakdown)
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_batch_reports_match_per_period_scan(manager, workers):
+    reports = manager.generate_batch_reports(PERIODS, workers=workers)
+
+    assert [(r.start_date, r.end_date, r.report_type) for r in reports] == PERIODS
+    for report, (start_date, end_date, _) in zip(reports, PERIODS):
+        assert as_tuple(report) == reference_period_report(manager, start_date, end_date)
+
+
+def test_empty_days_and_empty_period(manager):
+    report = manager.generate_period_report(date(2024, 1, 2), date(2024, 1, 3))
+    assert report.daily_breakdown[date(2024, 1, 2)] == {'total_hours': 0, 'total_reduction': 0, 'record_count': 0}
+
+    empty = manager.generate_period_report(date(2024, 6, 1), date(2024, 6, 30))
+    assert empty.total_hours == 0
+    assert all(stats['shedding_count'] == 0 for stats in empty.line_statistics.values())
@@ -0,0 +1,94 @@
+import json
+import os
+from datetime import date
+
+import pytest
+
+from src.core.load_manager import LoadSheddingManager
+from src.core.region_manager import RegionManager
+from src.models.models import TimeSlot
+
+
+@pytest.fixture
+def regions(tmp_path):
+    regions = RegionManager(str(tmp_path), max_resident_records=0)
+    regions.add_region('north', create=True)
+    regions.add_region('south', create=True)
+    return regions
+
+
+def test_evict_and_reload_round_trip(regions):
+    north = regions.get('north')
+    for day in range(1, 6):
+        north.calculate_fair_shedding(15, TimeSlot.MORNING, date(2024, 1, day))
+    history = list(north.shedding_history)
+    monthly = {line_id: dict(stats.monthly_hours) for line_id, stats in north.stats.items()}
+
+    regions.get('south')
+    assert not regions.is_loaded('north')
+
+    reloaded = regions.get('north')
+    assert reloaded is not north
+    assert reloaded.shedding_history == history
+    assert {line_id: stats.monthly_hours for line_id, stats in reloaded.stats.items()} == monthly
+
+
+def test_evicted_manager_rejects_writes(regions):
+    north = regions.get('north')
+    north.calculate_fair_shedding(15, TimeSlot.MORNING, date(2024, 1, 1))
+    regions.get('south')
+    with pytest.raises(RuntimeError):
+        north.calculate_fair_shedding(15, TimeSlot.MORNING, date(2024, 1, 1))
+
+
+def test_pinned_region_is_not_evicted(regions):
+    with regions.use('north') as north:
+        regions.get('south')
+        assert regions.is_loaded('north')
+        north.calculate_fair_shedding(15, TimeSlot.MORNING, date(2024, 1, 1))
+    assert not regions.is_loaded('north')
+
+
+def test_bad_region_file_is_not_overwritten(regions, tmp_path):
+    path = tmp_path / 'north.json'
+    data = json.loads(path.read_text(encoding='utf-8'))
+    data['shedding_history'] = [
+        {'line_id': 1, 'date': '2024-01-01', 'time_slot': 'noon',
+         'duration_hours': 2.0, 'load_reduced_mw': 10.0}
+    ]
+    path.write_text(json.dumps(data), encoding='utf-8')
+
+    with pytest.raises(Exception):
+        regions.get('north')
+    regions.get('south')
+    assert json.loads(path.read_text(encoding='utf-8')) == data
+
+
+def test_report_does_not_create_missing_region(regions, tmp_path):
+    regions.add_region('east')
+    with pytest.raises(FileNotFoundError):
+        regions.generate_regions_report(date(2024, 1, 1), date(2024, 1, 31))
+    assert not os.path.exists(tmp_path / 'east.json')
+
+
+def test_failed_save_keeps_region_loaded(regions, monkeypatch):
+    north = regions.get('north')
+    north.calculate_fair_shedding(15, TimeSlot.MORNING, date(2024, 1, 1))
+    records = len(north.shedding_history)
+
+    def fail(snapshot, filename):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(LoadSheddingManager, 'write_snapshot', staticmethod(fail))
+        # الحفظ الفاشل لا يُفشل طلب منطقة أخرى
+        assert regions.get('south') is not None
+        assert regions.is_loaded('north')
+        assert 'disk full' in regions.last_evict_error
+        with pytest.raises(OSError):
+            regions.evict('north')
+        assert regions.is_loaded('north')
+
+    north.calculate_fair_shedding(15, TimeSlot.EVENING, date(2024, 1, 1))
+    regions.evict('north')
+    assert len(regions.get('north').shedding_history) == len(north.shedding_history) > records
@@ -0,0 +1,142 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from src.core.load_manager import LoadSheddingManager
+from src.core.schedule_horizon import ScheduleHorizon
+from src.models.models import TimeSlot
+
+START = date(2024, 3, 27)
+DAYS = 10
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return LoadSheddingManager(data_file=str(tmp_path / 'load_data.json'), verbose=False)
+
+
+@pytest.fixture
+def horizon(manager):
+    forecast = {
+        (START + timedelta(days=offset), time_slot): 5 * ((offset + index) % 7 + 1)
+        for offset in range(DAYS)
+        for index, time_slot in enumerate(TimeSlot)
+    }
+    horizon = ScheduleHorizon(manager, DAYS, forecast, START)
+    yield horizon
+    horizon.close()
+
+
+def sequential_plans(manager, horizon, tmp_path):
+    """الخطط الناتجة عن استدعاء calculate_fair_shedding بالترتيب على نسخة من المدير"""
+    copy_file = str(tmp_path / 'copy.json')
+    manager.save_data(copy_file)
+    clone = LoadSheddingManager.from_data_file(copy_file)
+
+    plans = {}
+    for offset in range(DAYS):
+        target_date = horizon.start_date + timedelta(days=offset)
+        for time_slot in TimeSlot:
+            key = (target_date, time_slot)
+            if key in horizon.committed_slots:
+                continue
+            plans[key] = clone.calculate_fair_shedding(horizon.forecast.get(key, 0), time_slot, target_date)
+    return plans
+
+
+def horizon_plans(horizon):
+    return {
+        (horizon.start_date + timedelta(days=offset), time_slot):
+            horizon.get_plan(horizon.start_date + timedelta(days=offset), time_slot)
+        for offset in range(DAYS)
+        for time_slot in TimeSlot
+        if (horizon.start_date + timedelta(days=offset), time_slot) not in horizon.committed_slots
+    }
+
+
+def test_initial_plans_match_sequential(manager, horizon, tmp_path):
+    assert horizon_plans(horizon) == sequential_plans(manager, horizon, tmp_path)
+
+
+def test_get_plan_does_not_touch_stats(manager, horizon):
+    assert horizon.get_plan(START, TimeSlot.MORNING)
+    assert manager.shedding_history == []
+    assert horizon.get_plan(START + timedelta(days=DAYS), TimeSlot.MORNING) is None
+
+
+def test_commit_matches_sequential(manager, horizon, tmp_path):
+    expected = horizon.get_plan(START, TimeSlot.MORNING)
+    assert horizon.commit(START, TimeSlot.MORNING) == expected
+    assert len(manager.shedding_history) == len(expected)
+    assert horizon.get_plan(START, TimeSlot.MORNING) is None
+    assert horizon_plans(horizon) == sequential_plans(manager, horizon, tmp_path)
+
+
+def test_toggle_replans_only_affected_group(manager, horizon, tmp_path):
+    before = horizon.replan_count
+    line = manager.registry.get(3)
+    manager.toggle_line_status(3, False)
+
+    replanned = horizon.replan_count - before
+    assert replanned == len(horizon.group_slots(line.group))
+    assert horizon_plans(horizon) == sequential_plans(manager, horizon, tmp_path)
+
+
+def test_forecast_update_replans_from_slot(manager, horizon, tmp_path):
+    key = (START + timedelta(days=6), TimeSlot.EVENING)
+    chain = horizon.chain_slots(*key)
+
+    before = horizon.replan_count
+    horizon.update_forecast({key: 35})
+    assert horizon.replan_count - before == len(chain) - chain.index(key)
+    assert horizon_plans(horizon) == sequential_plans(manager, horizon, tmp_path)
+
+
+def test_advance_matches_sequential(manager, horizon, tmp_path):
+    horizon.commit(START, TimeSlot.MORNING)
+    horizon.advance(START + timedelta(days=3))
+    assert horizon_plans(horizon) == sequential_plans(manager, horizon, tmp_path)
+
+
+def test_close_stops_replanning(manager, horizon):
+    horizon.close()
+    before = horizon.replan_count
+    manager.toggle_line_status(3, False)
+    assert horizon.replan_count == before
+
+
+def test_reload_replans_with_new_lines(manager, horizon, tmp_path):
+    data_file = tmp_path / 'other.json'
+    data = {
+        'lines': [
+            {'id': line_id, 'name': f"Line_{line_id}", 'group': line_id % 2, 'capacity_mw': 10.0, 'is_active': True}
+            for line_id in (100, 101, 204, 205)
+        ],
+        'shedding_history': []
+    }
+    data_file.write_text(json.dumps(data), encoding='utf-8')
+
+    stale = horizon.get_plan(START, TimeSlot.MORNING)
+    manager.load_data(str(data_file))
+
+    planned_ids = {
+        item['line_id']
+        for plan in horizon_plans(horizon).values()
+        for item in plan
+    }
+    assert planned_ids and planned_ids <= {100, 101, 204, 205}
+    assert horizon.get_plan(START, TimeSlot.MORNING) != stale
+    assert horizon_plans(horizon) == sequential_plans(manager, horizon, tmp_path)
+    assert horizon.commit(START, TimeSlot.MORNING)
+
+
+def test_stale_plan_is_rejected_without_side_effects(manager, tmp_path):
+    plan = manager.plan_fair_shedding(15, TimeSlot.MORNING, START)
+    manager.save_data(str(tmp_path / 'copy.json'))
+    manager.load_data(str(tmp_path / 'copy.json'))
+
+    with pytest.raises(ValueError):
+        manager.apply_shedding_plan(plan, TimeSlot.MORNING, START)
+    assert manager.shedding_history == []
+    assert all(stats.total_hours == 0 for stats in manager.stats.values())